@@ -10,128 +10,383 @@
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import sys
+import os
+import argparse
+import functools
+import hashlib
+import io
+import urllib.request
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Copy-on-Write avoids defensive copies between pipeline stages; it is
+# opt-in on pandas 2.x and always on from pandas 3.0
+if pd.__version__.startswith("2."):
+    pd.options.mode.copy_on_write = True
+
+# Errors the pipeline stages can raise; main reports these instead of a traceback
+_PIPELINE_ERRORS = (OSError, ValueError)
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    _PIPELINE_ERRORS += (pa.lib.ArrowException,)
+except ImportError:
+    pa = None
+
+try:
+    import bottleneck as bn
+    _nanmedian = bn.nanmedian
+except ImportError:
+    _nanmedian = np.nanmedian
+
+try:
+    from numba import njit, prange
+    from numba.core.errors import NumbaError
+    _HAVE_NUMBA = True
+    _PIPELINE_ERRORS += (NumbaError,)
+except ImportError:
+    _HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit when numba is not installed."""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
 
 EXPECTED_COLS = [
     'Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness',
     'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age', 'Outcome'
 ]
 
-def load_data(url):
-    """Loads data from a specified URL into a pandas DataFrame."""
-    try:
-        data = pd.read_csv(url)
-        print("Data loaded successfully.")
-        return data
-    except Exception as e:
-        print(f"Error loading data: {e}")
-        return None
+# Columns where a zero reading is biologically impossible and means "missing"
+CLEAN_COLS = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
+
+# Downloaded datasets are cached here as Parquet, keyed by a hash of the URL
+CACHE_DIR = Path("~/.cache/medcsv").expanduser()
 
+# Compact dtypes halve memory traffic for the column-wise cleaning and stats
+COLUMN_DTYPES = {
+    'Pregnancies': 'int8', 'Glucose': 'float32', 'BloodPressure': 'float32',
+    'SkinThickness': 'float32', 'Insulin': 'float32', 'BMI': 'float32',
+    'DiabetesPedigreeFunction': 'float32', 'Age': 'int8', 'Outcome': 'int8'
+}
+
+@njit(cache=True)
+def _select(a, k):
+    """
+    Partially sorts a in place so that a[k] is its k-th smallest value.
+    Uses a three-way partition around a median-of-three pivot so that runs of
+    equal values (e.g. a column full of identical readings) stay linear time.
+    """
+    lo, hi = 0, a.shape[0] - 1
+    while lo < hi:
+        x, y, z = a[lo], a[(lo + hi) // 2], a[hi]
+        if x > y:
+            x, y = y, x
+        pivot = max(x, min(y, z))
+        # a[lo:lt] < pivot, a[lt:i] == pivot, a[gt+1:hi+1] > pivot
+        lt, i, gt = lo, lo, hi
+        while i <= gt:
+            v = a[i]
+            if v < pivot:
+                a[lt], a[i] = a[i], a[lt]
+                lt += 1
+                i += 1
+            elif v > pivot:
+                a[i], a[gt] = a[gt], a[i]
+                gt -= 1
+            else:
+                i += 1
+        if k < lt:
+            hi = lt - 1
+        elif k > gt:
+            lo = gt + 1
+        else:
+            break
+    return a[k]
+
+@njit(cache=True)
+def _quickselect_median(a):
+    """Returns the median of a (NaN if empty), reordering a in place."""
+    n = a.shape[0]
+    if n == 0:
+        return np.nan
+    k = n // 2
+    upper = _select(a, k)
+    if n % 2 == 1:
+        return upper
+    # After selection a[:k] holds the k smallest values
+    lower = a[0]
+    for i in range(1, k):
+        if a[i] > lower:
+            lower = a[i]
+    return (lower + upper) / 2.0
+
+@njit(cache=True)
+def _fill_column(col):
+    """Fills zero/NaN entries of col with the median of its remaining values, in place."""
+    n = col.shape[0]
+    scratch = np.empty(n, dtype=col.dtype)
+    k = 0
+    for i in range(n):
+        v = col[i]
+        if v != 0.0 and v == v:
+            scratch[k] = v
+            k += 1
+    med = _quickselect_median(scratch[:k])
+    for i in range(n):
+        v = col[i]
+        if v == 0.0 or v != v:
+            col[i] = med
+
+@njit(parallel=True, cache=True)
+def _clean_block(block):
+    """Fills zero/NaN entries of each column in block with that column's median, in place."""
+    for j in prange(block.shape[1]):
+        _fill_column(block[:, j])
+
+# Below this many rows, starting threads costs more than the medians themselves
+_PARALLEL_MEDIAN_MIN_ROWS = 100_000
+
+def _column_medians(block):
+    """Returns the NaN-ignoring median of each column, one thread per column for large blocks."""
+    if block.shape[0] < _PARALLEL_MEDIAN_MIN_ROWS:
+        return _nanmedian(block, axis=0)
+    # The NumPy/bottleneck median kernels release the GIL, so threads run in parallel
+    columns = [np.ascontiguousarray(block[:, j]) for j in range(block.shape[1])]
+    with ThreadPoolExecutor(max_workers=min(len(columns), os.cpu_count() or 1)) as ex:
+        return np.array(list(ex.map(_nanmedian, columns)), dtype=block.dtype)
+
+def _read_csv_arrow(url):
+    """Parses the headerless CSV with pyarrow's multithreaded reader into COLUMN_DTYPES."""
+    if "://" in url:
+        with urllib.request.urlopen(url) as response:
+            source = io.BytesIO(response.read())
+    else:
+        source = url
+    column_types = {col: pa.from_numpy_dtype(np.dtype(dtype)) for col, dtype in COLUMN_DTYPES.items()}
+    table = pacsv.read_csv(
+        source,
+        read_options=pacsv.ReadOptions(column_names=EXPECTED_COLS, use_threads=True),
+        convert_options=pacsv.ConvertOptions(column_types=column_types),
+    )
+    return table.to_pandas()
+
+def _require_df(fn):
+    """Raises ValueError unless the first argument is a non-empty DataFrame."""
+    @functools.wraps(fn)
+    def wrapper(df, *args, **kwargs):
+        if df is None or len(df.index) == 0:
+            raise ValueError(f"{fn.__name__}: DataFrame is empty or None.")
+        return fn(df, *args, **kwargs)
+    return wrapper
+
+def load_data(url, use_cache=True):
+    """Loads data from a specified URL into a pandas DataFrame, caching remote downloads as Parquet."""
+    use_cache = use_cache and url.startswith(("http://", "https://"))
+    cache_path = CACHE_DIR / f"{hashlib.sha1(url.encode()).hexdigest()}.parquet"
+    if use_cache and cache_path.exists():
+        try:
+            data = pd.read_parquet(cache_path)
+            print(f"Data loaded from cache {cache_path}.")
+            return data
+        except Exception as e:
+            print(f"Warning: could not read cached data ({e}), downloading again.")
+    # The source CSV has no header row, so names and dtypes are set here
+    if pa is not None:
+        data = _read_csv_arrow(url)
+    else:
+        data = pd.read_csv(url, header=None, names=EXPECTED_COLS, dtype=COLUMN_DTYPES)
+    if use_cache:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            data.to_parquet(cache_path, compression="snappy", index=False)
+        except Exception as e:
+            print(f"Warning: could not cache data ({e}).")
+    print("Data loaded successfully.")
+    return data
+
+@_require_df
 def verify_and_rename_columns(df):
-    """Verifies column count and assigns meaningful names if needed."""
-    if df is None or df.empty:
-        print("Error: DataFrame is empty or None.")
-        return None
-    if len(df.columns) == len(EXPECTED_COLS):
+    """Verifies column count, assigns meaningful names if needed and applies compact dtypes."""
+    if list(df.columns) != EXPECTED_COLS:
+        if len(df.columns) != len(EXPECTED_COLS):
+            raise ValueError(f"Unexpected number of columns in the dataset: {df.columns.tolist()}")
         df.columns = EXPECTED_COLS
-    else:
-        print("Error: Unexpected number of columns in the dataset.")
-        print(f"Found columns: {df.columns.tolist()}")
-        return None
-    return df
+    return df.astype(COLUMN_DTYPES)
 
+@_require_df
 def clean_data(df):
     """
     Cleans the DataFrame by handling missing values and ensuring correct data types.
     Treats biologically impossible zeroes as missing (NaN), then fills with median.
     """
-    if df is None or df.empty:
-        print("Error: Cannot clean empty or None DataFrame.")
-        return None
-    columns_to_clean = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
+    columns_to_clean = CLEAN_COLS
     for col in columns_to_clean:
         if col not in df.columns:
-            print(f"Error: Expected column '{col}' not found in DataFrame.")
-            return None
-    df[columns_to_clean] = df[columns_to_clean].replace(0, np.nan)
-    df[columns_to_clean] = df[columns_to_clean].apply(lambda x: x.fillna(x.median()))
+            raise ValueError(f"Expected column '{col}' not found in DataFrame.")
+    # float32 for frames compacted by verify_and_rename_columns, wider floats otherwise
+    block_dtype = np.result_type(*df[columns_to_clean].dtypes, np.float32)
+    block = df[columns_to_clean].to_numpy(dtype=block_dtype, copy=True)
+    if _HAVE_NUMBA:
+        _clean_block(block)
+    else:
+        # Mask zeroes, take medians and fill on one NumPy block
+        missing = np.isnan(block)
+        missing |= block == 0.0
+        np.copyto(block, np.nan, where=missing)
+        medians = _column_medians(block)
+        np.copyto(block, medians, where=missing)
+    if (df[columns_to_clean].dtypes == block.dtype).all():
+        # Single in-place write-back when the columns already have the block dtype
+        df.loc[:, columns_to_clean] = block
+    else:
+        df[columns_to_clean] = block
     print("\nCleaned data head:")
     print(df.head())
     return df
 
-def analyze_and_summarize(df, save_summary=False):
-    """Performs data analysis, generates summary, and visualizes key findings."""
-    if df is None or df.empty:
-        print("Error: Cannot analyze empty or None DataFrame.")
-        return
-    output_lines = []
-    output_lines.append("Statistical Summary:\n")
-    output_lines.append(df.describe().T.to_string())
-    diabetes_counts = df['Outcome'].value_counts()
-    output_lines.append("\nDiabetes Outcome Distribution:")
-    output_lines.append(diabetes_counts.to_string())
-    mean_bmi_by_outcome = df.groupby('Outcome')['BMI'].mean()
-    output_lines.append("\nMean BMI by Outcome (0=Non-diabetic, 1=Diabetic):")
-    output_lines.append(mean_bmi_by_outcome.to_string())
-    summary_report = "\n".join(output_lines)
+def _summary_statistics(df):
+    """Returns per-column count, mean, std, min and max from NumPy reductions (no sorting)."""
+    arr = df.to_numpy(dtype=np.float64)
+    return pd.DataFrame({
+        "count": np.count_nonzero(~np.isnan(arr), axis=0),
+        "mean": np.nanmean(arr, axis=0),
+        "std": np.nanstd(arr, axis=0, ddof=1),
+        "min": np.nanmin(arr, axis=0),
+        "max": np.nanmax(arr, axis=0),
+    }, index=df.columns)
+
+@_require_df
+def analyze_and_summarize(df, save_summary=False, save_figures=True,
+                          figure_filename="analysis_figures.png", use_gpu=False):
+    """
+    Performs data analysis, generates summary, and visualizes key findings.
+    Figures are saved to figure_filename when save_figures is set, otherwise shown.
+    With use_gpu, histogram counts are computed on the GPU via CuPy if available.
+    """
+    # Pull the columns used below out of the frame once and reuse the arrays
+    outcome_arr = df['Outcome'].to_numpy()
+    feature_arrs = {"BMI": df['BMI'].to_numpy(), "Glucose": df['Glucose'].to_numpy()}
+    diabetic = outcome_arr == 1
+    # Outcome is 0/1, so counts and per-group means are plain bincounts
+    outcome_codes = outcome_arr.astype(np.intp)
+    counts = np.bincount(outcome_codes, minlength=2)
+    # Missing BMI readings are skipped in the per-group mean, as groupby does
+    bmi = feature_arrs["BMI"]
+    finite = ~np.isnan(bmi)
+    bmi_sums = np.bincount(outcome_codes[finite], weights=bmi[finite], minlength=2)
+    bmi_counts = np.bincount(outcome_codes[finite], minlength=2)
+    outcome_index = pd.RangeIndex(len(counts), name='Outcome')
+    diabetes_counts = pd.Series(counts, index=outcome_index, name='count')
+    with np.errstate(invalid='ignore'):
+        mean_bmi_by_outcome = pd.Series(bmi_sums / bmi_counts, index=outcome_index, name='BMI')
+    # Tables are rendered straight into one buffer instead of joining strings
+    buf = io.StringIO()
+    buf.write("Statistical Summary:\n\n")
+    _summary_statistics(df).to_string(buf=buf)
+    buf.write("\n\nDiabetes Outcome Distribution:\n")
+    diabetes_counts.to_string(buf=buf)
+    buf.write("\n\nMean BMI by Outcome (0=Non-diabetic, 1=Diabetic):\n")
+    mean_bmi_by_outcome.to_string(buf=buf)
+    summary_report = buf.getvalue()
     print("\n" + summary_report)
     if save_summary:
-        with open("summary_report.txt", "w") as f:
+        with open("summary_report.txt", "w", encoding="utf-8", buffering=1 << 16) as f:
             f.write(summary_report)
         print("Summary report saved to summary_report.txt")
-    # Bar chart for diabetes outcome
-    plt.figure(figsize=(8, 6))
-    diabetes_counts.plot(kind='bar', color=['skyblue', 'salmon'])
-    plt.title('Distribution of Diabetes Outcomes')
-    plt.xlabel('Outcome (0 = No Diabetes, 1 = Diabetes)')
-    plt.ylabel('Number of Patients')
-    plt.xticks(rotation=0)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.tight_layout()
-    plt.show()
-    # Histogram for BMI
-    plt.figure(figsize=(8, 6))
-    for outcome, color in zip([0, 1], ['skyblue', 'salmon']):
-        df[df["Outcome"] == outcome]["BMI"].plot(kind="hist", alpha=0.5, color=color, bins=20, label=f"Outcome {outcome}")
-    plt.title("BMI Distribution by Diabetes Outcome")
-    plt.xlabel("BMI")
-    plt.ylabel("Frequency")
-    plt.legend()
-    plt.tight_layout()
-    plt.show()
-    # Histogram for Glucose
-    plt.figure(figsize=(8, 6))
-    for outcome, color in zip([0, 1], ['skyblue', 'salmon']):
-        df[df["Outcome"] == outcome]["Glucose"].plot(kind="hist", alpha=0.5, color=color, bins=20, label=f"Outcome {outcome}")
-    plt.title("Glucose Distribution by Diabetes Outcome")
-    plt.xlabel("Glucose")
-    plt.ylabel("Frequency")
-    plt.legend()
-    plt.tight_layout()
-    plt.show()
-
-def save_cleaned_data(df, filename="cleaned_data.csv"):
-    """Save cleaned dataframe to a CSV file."""
-    if df is not None and not df.empty:
-        df.to_csv(filename, index=False)
-        print(f"Cleaned data saved to {filename}")
-
-def main():
+    # Import matplotlib lazily; the headless Agg backend is enough for saving
+    import matplotlib
+    if save_figures:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    colors = ['skyblue', 'salmon']
+    xp = np
+    if use_gpu:
+        try:
+            import cupy
+            # Importing succeeds without a GPU, so check for a usable device too
+            if cupy.cuda.runtime.getDeviceCount() < 1:
+                raise RuntimeError("no CUDA device found")
+            xp = cupy
+        except Exception as e:
+            print(f"Warning: GPU unavailable ({e}), computing histograms on the CPU.")
+    to_host = np.asarray if xp is np else xp.asnumpy
+    # Outcome bar chart plus BMI and Glucose histograms on one figure, closed
+    # when done so its canvas and caches are not kept alive
+    fig, axes = plt.subplots(1, 3, figsize=(18, 6))
+    try:
+        ax = axes[0]
+        ax.bar(diabetes_counts.index.astype(str), diabetes_counts.to_numpy(), color=colors)
+        ax.set_title('Distribution of Diabetes Outcomes')
+        ax.set_xlabel('Outcome (0 = No Diabetes, 1 = Diabetes)')
+        ax.set_ylabel('Number of Patients')
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+        # Each column is transferred to the device once; only bin counts come back
+        masks = [xp.asarray(~diabetic), xp.asarray(diabetic)]
+        for ax, (feature, arr) in zip(axes[1:], feature_arrs.items()):
+            values = xp.asarray(arr)
+            finite = ~xp.isnan(values)
+            # Shared bin edges so both outcome histograms overlay on one grid
+            edges = np.linspace(float(xp.nanmin(values)), float(xp.nanmax(values)), 21)
+            edges_xp = xp.asarray(edges)
+            for outcome, mask, color in zip([0, 1], masks, colors):
+                hist = to_host(xp.histogram(values[mask & finite], bins=edges_xp)[0])
+                ax.stairs(hist, edges, fill=True, alpha=0.5, color=color, label=f"Outcome {outcome}")
+            ax.set_title(f"{feature} Distribution by Diabetes Outcome")
+            ax.set_xlabel(feature)
+            ax.set_ylabel("Frequency")
+            ax.legend()
+        fig.tight_layout()
+        if save_figures:
+            fig.savefig(figure_filename)
+            print(f"Figures saved to {figure_filename}")
+        else:
+            plt.show()
+    finally:
+        plt.close(fig)
+
+@_require_df
+def save_cleaned_data(df, filename=None, file_format="parquet"):
+    """Save cleaned dataframe to a snappy-compressed Parquet file, or CSV with file_format="csv"."""
+    if file_format not in ("parquet", "csv"):
+        raise ValueError(f"Unsupported file format '{file_format}', expected 'parquet' or 'csv'.")
+    filename = filename or f"cleaned_data.{file_format}"
+    other_suffix = ".csv" if file_format == "parquet" else ".parquet"
+    if Path(filename).suffix.lower() == other_suffix:
+        raise ValueError(f"Filename '{filename}' does not match file format '{file_format}'.")
+    if file_format == "parquet":
+        try:
+            df.to_parquet(filename, compression="snappy", index=False)
+            print(f"Cleaned data saved to {filename}")
+            return
+        except ImportError as e:
+            filename = str(Path(filename).with_suffix(".csv"))
+            print(f"Warning: Parquet output unavailable ({e}), writing CSV instead.")
+    df.to_csv(filename, index=False)
+    print(f"Cleaned data saved to {filename}")
+
+def main(argv=None):
     """Main function to run the data analysis workflow."""
+    parser = argparse.ArgumentParser(description="Medical data cleanup and analysis.")
+    parser.add_argument("--gpu", action="store_true",
+                        help="compute histograms on the GPU with CuPy")
+    args = parser.parse_args(argv)
     data_url = "https://raw.githubusercontent.com/jbrownlee/Datasets/master/pima-indians-diabetes.csv"
-    medical_data = load_data(data_url)
-    medical_data = verify_and_rename_columns(medical_data)
-    if medical_data is not None:
+    # Stages raise on bad input; errors are reported once here
+    try:
+        medical_data = verify_and_rename_columns(load_data(data_url))
         cleaned_data = clean_data(medical_data)
-        if cleaned_data is not None:
-            save_cleaned_data(cleaned_data)
-            analyze_and_summarize(cleaned_data, save_summary=True)
-            print("\nProject completed successfully.")
-        else:
-            print("Data cleaning failed.")
-    else:
-        print("Data loading or column verification failed.")
+        save_cleaned_data(cleaned_data)
+        analyze_and_summarize(cleaned_data, save_summary=True, use_gpu=args.gpu)
+    except _PIPELINE_ERRORS as e:
+        print(f"Error: {e}")
+        print("Project failed.")
+        sys.exit(1)
+    print("\nProject completed successfully.")
 
 if __name__ == "__main__":
     main()